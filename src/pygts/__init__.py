@@ -31,7 +31,6 @@ For more information:
 """
 
 from .data_fetcher import fetch_species_data_parallel, request_data, species_exists
-from .visualizer import plot_species_distribution
 
 __version__ = "0.1.0"
 
@@ -41,3 +40,13 @@ __all__ = [
     "fetch_species_data_parallel",
     "plot_species_distribution",
 ]
+
+
+def __getattr__(name):
+    # geopandas and matplotlib are slow to import, so the visualizer is only
+    # loaded once plot_species_distribution is actually requested.
+    if name == "plot_species_distribution":
+        from .visualizer import plot_species_distribution
+
+        return plot_species_distribution
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
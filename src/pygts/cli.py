@@ -16,6 +16,8 @@ Usage:
 import argparse
 import sys
 
+import pandas as pd
+
 from pygts.data_fetcher import request_data, species_exists
 from pygts.visualizer import plot_species_distribution
 
@@ -61,21 +63,19 @@ def cli_fetch(args):
         import json
         print(json.dumps(data, indent=2))
     else:
-        # Group by country
-        from collections import defaultdict
-        by_country = defaultdict(list)
-        for entry in data:
-            country = entry.get('country', 'Unknown')
-            province = entry.get('province')
-            if province:
-                by_country[country].append(province)
-            else:
-                by_country[country].append('(entire country)')
+        # Group by country (groupby sorts the country keys)
+        df = pd.DataFrame(data, columns=["country", "province"])
+        df["country"] = df["country"].fillna("Unknown")
+        df["province"] = df["province"].where(
+            df["province"].notna() & (df["province"] != ""), "(entire country)"
+        )
+        grouped = df.groupby("country", sort=True)["province"].agg(
+            lambda provinces: sorted(provinces.unique())
+        )
         
-        for country in sorted(by_country.keys()):
-            provinces = by_country[country]
+        for country, provinces in grouped.items():
             print(f"  {country}:")
-            for province in sorted(provinces):
+            for province in provinces:
                 print(f"    - {province}")
 
 
@@ -97,16 +97,19 @@ def cli_visualize(args):
         print("\n✓ Displaying map...")
 
 
-def main():
-    """Main entry point for the pyGTS command-line interface.
+def get_parser():
+    """Build the argument parser for the pyGTS command-line interface.
     
-    Parses command-line arguments and dispatches to appropriate handler functions.
-    Called automatically when the package is run as 'pygts' from the command line.
+    Each subcommand stores its handler as ``func`` on the parsed namespace,
+    so callers can dispatch with ``args.func(args)``.
     
     Commands:
         check: Validate species existence (returns exit code 0/1)
         fetch: Retrieve and display geographic data
         visualize (viz): Generate distribution map
+    
+    Returns:
+        argparse.ArgumentParser: Parser with the check, fetch and visualize subcommands
     """
     parser = argparse.ArgumentParser(
         prog="pygts",
@@ -152,7 +155,16 @@ def main():
     )
     viz_parser.set_defaults(func=cli_visualize)
     
-    # Parse arguments
+    return parser
+
+
+def main():
+    """Main entry point for the pyGTS command-line interface.
+    
+    Parses command-line arguments and dispatches to appropriate handler functions.
+    Called automatically when the package is run as 'pygts' from the command line.
+    """
+    parser = get_parser()
     args = parser.parse_args()
     
     if not args.command:
@@ -15,11 +15,145 @@ API Reference:
     BGCI Global Tree Search: https://www.bgci.org/resources/global-tree-search/
 """
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the "speedups" extra
+    orjson = None
+
+# Decode response bodies with orjson when available; both accept raw bytes.
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Separate connect/read timeouts: fail fast on unreachable hosts, but give the
+# API time to build large responses.
+_TIMEOUT = (3.05, 10)
+
+# Upper bound on simultaneous requests to the BGCI API from this process,
+# whatever the number of threads, so large batches don't trigger rate limiting.
+_MAX_PER_HOST = 8
+_HOST_SEMAPHORE = threading.BoundedSemaphore(_MAX_PER_HOST)
+
+# Keep-alive pool size; never below _MAX_PER_HOST, or connections in flight
+# would be discarded instead of reused.
+_DEFAULT_POOL_SIZE = max(10, _MAX_PER_HOST)
+
+# Shared session so keep-alive connections are reused across calls instead of
+# paying a new TCP+TLS handshake per request.
+_SESSION = requests.Session()
+_POOL_SIZE = None
+
+
+def _make_adapter(pool_size: int) -> HTTPAdapter:
+    """Build an HTTPAdapter with a connection pool of the given size."""
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+    )
+    return HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+    )
+
+
+def configure_session(pool_size: int = _DEFAULT_POOL_SIZE) -> None:
+    """Resize the connection pool of the shared HTTP session.
+    
+    The pool should be at least as large as the number of requests in flight,
+    otherwise connections are discarded instead of being returned to the
+    pool. Since at most ``_MAX_PER_HOST`` requests are sent at once, the
+    default (10, or ``_MAX_PER_HOST`` if larger) is enough for
+    fetch_species_data_parallel() whatever its max_workers.
+    
+    Args:
+        pool_size (int, optional): Maximum number of connections kept alive
+            per host. Default is 10, or ``_MAX_PER_HOST`` if larger.
+    """
+    global _POOL_SIZE
+    if pool_size == _POOL_SIZE:
+        return
+    old_adapters = {
+        _SESSION.adapters[prefix]
+        for prefix in ("https://", "http://")
+        if prefix in _SESSION.adapters
+    }
+    adapter = _make_adapter(pool_size)
+    _SESSION.mount("https://", adapter)
+    _SESSION.mount("http://", adapter)
+    for old in old_adapters:
+        old.close()
+    _POOL_SIZE = pool_size
+
+
+configure_session()
+
+
+# species_exists() only needs the start of the body to answer; servers that
+# honour Range reply 206 with just these bytes.
+_PROBE_HEADERS = {"Range": "bytes=0-4095"}
+# Only trusted when "results" is the first key of the top-level object; a
+# "results" key nested deeper could belong to anything.
+_RESULTS_HEAD = re.compile(rb'\s*\{\s*"results"\s*:\s*\[\s*([\]{])')
+
+# Definitive species_exists() answers, keyed by (genus, species)
+_EXISTS_CACHE = {}
+
+
+def _results_present(content: bytes) -> bool | None:
+    """Tell whether a (possibly truncated) response body has any results.
+    
+    Returns None when the body can neither be parsed nor recognised from its
+    first bytes, which requires the top-level object to open with its
+    ``"results"`` array.
+    """
+    try:
+        results = _json_loads(content).get("results", [])
+    except (ValueError, AttributeError):
+        match = _RESULTS_HEAD.match(content)
+        return None if match is None else match.group(1) == b"{"
+    return bool(results and isinstance(results, list))
+
+
+def _extract_geolinks(doc: dict) -> list | None:
+    """Return ``doc["results"][0]["TSGeolinks"]``, or None if absent or empty.
+    
+    Any unexpected shape of the response (missing keys, empty or non-list
+    results, non-dict entries) is treated as "no data".
+    """
+    try:
+        return doc["results"][0]["TSGeolinks"] or None
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+# Location fields whose values repeat heavily across species ("Brazil", ...)
+_INTERNED_FIELDS = ("country", "province", "uncertainty")
+
+
+def _intern_locations(locations: list) -> list:
+    """Make equal location strings share one object across all responses.
+    
+    Large batches otherwise hold thousands of copies of the same country and
+    province names. Entries are updated in place.
+    """
+    for entry in locations:
+        if isinstance(entry, dict):
+            for field in _INTERNED_FIELDS:
+                value = entry.get(field)
+                if isinstance(value, str):
+                    entry[field] = sys.intern(value)
+    return locations
 
 
 def species_exists(genus: str, species: str) -> bool:
@@ -30,9 +164,11 @@ def species_exists(genus: str, species: str) -> bool:
     or filtering species lists before expensive operations.
     
     Note:
-        This still makes an API call. For most use cases, prefer request_data()
-        which returns None for non-existent species and provides the actual data
-        in a single call.
+        This still makes an API call the first time a species is checked; the
+        answer is then remembered for the rest of the process. Only the first
+        few kilobytes of the response are requested when the server supports
+        it. For most use cases, prefer request_data() which returns None for
+        non-existent species and provides the actual data in a single call.
     
     Args:
         genus (str): The genus name (e.g., "Abarema", "Abies").
@@ -50,15 +186,28 @@ def species_exists(genus: str, species: str) -> bool:
     Raises:
         Does not raise exceptions. Network errors return False.
     """
+    key = (genus, species)
+    if key in _EXISTS_CACHE:
+        return _EXISTS_CACHE[key]
+    
     try:
         url = f"https://data.bgci.org/treesearch/genus/{genus}/species/{species}"
-        response = requests.get(url, timeout=10)
+        with _HOST_SEMAPHORE:
+            response = _SESSION.get(url, timeout=_TIMEOUT, headers=_PROBE_HEADERS)
         response.raise_for_status()
         
-        response_dict = response.json()
-        results = response_dict.get("results", [])
+        exists = _results_present(response.content)
+        if exists is None and response.status_code == 206:
+            # The partial body was inconclusive; fall back to the full response
+            with _HOST_SEMAPHORE:
+                response = _SESSION.get(url, timeout=_TIMEOUT)
+            response.raise_for_status()
+            exists = _results_present(response.content)
+        if exists is None:
+            return False
         
-        return bool(results and isinstance(results, list) and len(results) > 0)
+        _EXISTS_CACHE[key] = exists
+        return exists
     except Exception:
         return False
 
@@ -96,24 +245,15 @@ def request_data(genus: str, species: str) -> list | None:
     """
     try:
         url = f"https://data.bgci.org/treesearch/genus/{genus}/species/{species}"
-        response = requests.get(url, timeout=10)
+        with _HOST_SEMAPHORE:
+            response = _SESSION.get(url, timeout=_TIMEOUT)
         
         # Check for HTTP errors
         response.raise_for_status()
         
-        response_dict = response.json()
-        
-        # Safely navigate the response structure
-        results = response_dict.get("results", [])
-        if not results or not isinstance(results, list):
-            return None
-            
-        first_result = results[0]
-        if not isinstance(first_result, dict):
-            return None
-            
-        countries_dicts = first_result.get("TSGeolinks", [])
-        return countries_dicts if countries_dicts else None
+        response_dict = _json_loads(response.content)
+        countries_dicts = _extract_geolinks(response_dict)
+        return _intern_locations(countries_dicts) if countries_dicts else None
         
     except requests.exceptions.RequestException as e:
         # Handle network errors, timeouts, etc.
@@ -129,8 +269,21 @@ def request_data(genus: str, species: str) -> list | None:
         return None
 
 
+def _fetch_pair(pair: tuple[str, str]) -> list | dict | None:
+    """Run request_data() for one (genus, species) pair inside a worker.
+    
+    Exceptions are returned as an error dict so that one failure does not
+    abort the remaining results of executor.map().
+    """
+    try:
+        return request_data(*pair)
+    except Exception as e:
+        # This should rarely happen now since request_data handles its own errors
+        return {"error": str(e)}
+
+
 def fetch_species_data_parallel(
-    species_df: pd.DataFrame, max_workers: int = 10
+    species_df: pd.DataFrame, max_workers: int | None = 10
 ) -> list:
     """Fetch geographic data for multiple species in parallel.
     
@@ -138,14 +291,21 @@ def fetch_species_data_parallel(
     concurrent API requests. It maintains the order of results to match the input
     DataFrame and provides progress feedback via tqdm. Ideal for processing large
     species lists from CSV files or databases.
+    
+    Species appearing on several rows are requested only once; those rows
+    share the same result object.
 
     Args:
         species_df (pd.DataFrame): DataFrame containing at minimum:
             - 'Genus' (str): Genus names
             - 'Species' (str): Species epithets
-        max_workers (int, optional): Maximum concurrent threads. Default is 10.
-            Increase for faster processing (if API allows) or decrease to be
-            more conservative with API load.
+        max_workers (int, optional): Maximum concurrent threads. Default is 10;
+            None means no cap beyond the ones below. Increase for faster
+            processing (if API allows) or decrease to be more conservative
+            with API load. It is further capped at four
+            threads per CPU and at the number of distinct species. Regardless of
+            threads, at most ``_MAX_PER_HOST`` requests are sent to the API
+            at once.
 
     Returns:
         list: Ordered list of results matching input DataFrame rows. Each element:
@@ -160,42 +320,45 @@ def fetch_species_data_parallel(
         ...     'Species': ['cochliocarpos', 'alba']
         ... })
         >>> results = fetch_species_data_parallel(df, max_workers=5)
+        Fetching 2 species with 2 workers (at most 2 concurrent requests)
         Fetching species data: 100%|██████| 2/2 [00:01<00:00,  1.5it/s]
         Completed: 2 successful, 0 failed/no data
         >>> df['geo_data'] = results
         
     Note:
-        Progress bar and summary statistics are printed to stdout.
+        Effective concurrency, progress bar and summary statistics are printed
+        to stdout.
     """
-    results = [None] * len(species_df)
-    failed_count = 0
-    success_count = 0
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_index = {
-            executor.submit(request_data, row["Genus"], row["Species"]): idx
-            for idx, row in species_df.iterrows()
-        }
-
-        # Process completed tasks with progress bar
-        for future in tqdm(
-            as_completed(future_to_index),
-            total=len(species_df),
+    # Row-ordered (genus, species) pairs; each distinct pair is fetched once
+    genera = species_df["Genus"].to_numpy()
+    epithets = species_df["Species"].to_numpy()
+    pairs = list(zip(genera, epithets))
+    unique_pairs = list(dict.fromkeys(pairs))
+
+    # No more threads than the machine, or the work, can keep busy;
+    # max_workers=None means no user cap, as with ThreadPoolExecutor
+    cpu_limit = 4 * (os.cpu_count() or 1)
+    limit = max_workers if max_workers is not None else cpu_limit
+    workers = max(1, min(limit, cpu_limit, len(unique_pairs)))
+    print(
+        f"Fetching {len(unique_pairs)} species with {workers} workers "
+        f"(at most {min(workers, _MAX_PER_HOST)} concurrent requests)"
+    )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # One task per distinct species; map() yields results in input order
+        fetched = tqdm(
+            executor.map(_fetch_pair, unique_pairs),
+            total=len(unique_pairs),
             desc="Fetching species data",
-        ):
-            idx = future_to_index[future]
-            try:
-                result = future.result()
-                results[idx] = result
-                if result is None:
-                    failed_count += 1
-                else:
-                    success_count += 1
-            except Exception as e:
-                # This should rarely happen now since request_data handles its own errors
-                results[idx] = {"error": str(e)}
-                failed_count += 1
+        )
+        # Iterate the bar first so it sees its last step and closes itself
+        by_pair = {pair: result for result, pair in zip(fetched, unique_pairs)}
+
+    # Scatter results back to row positions (not index labels)
+    results = [by_pair[pair] for pair in pairs]
+    success_count = sum(isinstance(result, list) for result in results)
+    failed_count = len(results) - success_count
 
     print(f"\nCompleted: {success_count} successful, {failed_count} failed/no data")
     return results
@@ -22,8 +22,8 @@ def load_species_data(csv_path: str | Path) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame with three columns:
             - TaxonName (str): Original full species name
-            - Genus (str): Extracted genus name
-            - Species (str): Extracted species epithet
+            - Genus (string): Extracted genus name
+            - Species (string): Extracted species epithet
             
     Example:
         >>> df = load_species_data("data/species_list.csv")
@@ -38,9 +38,18 @@ def load_species_data(csv_path: str | Path) -> pd.DataFrame:
         IndexError: If species names don't contain at least two words.
     """
     path = Path(csv_path)
-    species_df = pd.read_csv(path)[["TaxonName"]]
-    species_df["Genus"] = species_df["TaxonName"].apply(lambda x: str(x).split(" ")[0])
-    species_df["Species"] = species_df["TaxonName"].apply(
-        lambda x: str(x).split(" ")[1]
+    # Only parse the column we need. A callable keeps the documented KeyError
+    # for a missing TaxonName column (a list would raise ValueError instead).
+    species_df = pd.read_csv(path, usecols=lambda column: column == "TaxonName")
+    # Split once, vectorized; words past the epithet (e.g. "var. ...") are dropped.
+    parts = (
+        species_df["TaxonName"]
+        .astype("string")
+        .str.split(" ", n=2, expand=True)
+        .reindex(columns=[0, 1])
     )
+    if parts[1].isna().any():
+        raise IndexError("TaxonName values must contain a genus and a species")
+    species_df["Genus"] = parts[0].astype("string")
+    species_df["Species"] = parts[1].astype("string")
     return species_df
\ No newline at end of file
@@ -18,13 +18,131 @@ Data Sources:
     - Base maps: Natural Earth (via naciscdn.org)
 """
 
+import functools
+import os
+import unicodedata
+from pathlib import Path
 from typing import Dict, List
 
 import geopandas as gpd
 import matplotlib.pyplot as plt
+import pandas as pd
 import requests
-from pygts.data_fetcher import request_data
+from pygts.data_fetcher import _SESSION, _TIMEOUT, request_data
 
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # optional speedup, see the "speedups" extra
+    _HAS_ARROW = False
+else:
+    _HAS_ARROW = True
+
+WORLD_URL = (
+    "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip"
+)
+PROVINCES_URL = (
+    "https://naciscdn.org/naturalearth/10m/cultural/"
+    "ne_10m_admin_1_states_provinces.zip"
+)
+
+# Simplification tolerance (degrees) for provinces drawn for interactive display
+_DISPLAY_TOLERANCE = 0.05
+
+
+def _cache_dir() -> Path:
+    """Return the directory where downloaded base maps are kept.
+    
+    Defaults to ``$XDG_CACHE_HOME/pygts`` (``~/.cache/pygts``); the
+    ``PYGTS_CACHE_DIR`` environment variable overrides it.
+    """
+    if os.environ.get("PYGTS_CACHE_DIR"):
+        return Path(os.environ["PYGTS_CACHE_DIR"])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "pygts"
+
+
+def _cached_download(url: str) -> Path:
+    """Download ``url`` into the cache directory unless already present.
+    
+    The file is written under a temporary name and renamed once complete, so
+    an interrupted download never leaves a truncated archive in the cache.
+    """
+    path = _cache_dir() / url.rsplit("/", 1)[-1]
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.name + ".part")
+        with _SESSION.get(url, timeout=_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            with open(partial, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+        partial.replace(path)
+    return path
+
+
+def _normalize_name(name: str) -> str:
+    """Fold case and strip accents ("Côte d'Ivoire" -> "cote d'ivoire").
+    
+    Only combining marks are dropped, so letters without an ASCII
+    decomposition ("ł", "ø", non-Latin scripts) are kept.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.casefold()
+
+
+def _with_match_keys(gdf: gpd.GeoDataFrame, columns: List[str]) -> gpd.GeoDataFrame:
+    """Add a normalized, categorical ``<column>_key`` for each name column.
+    
+    Computed once when a base map is loaded, so per-plot matching only
+    compares small integer codes.
+    """
+    for column in columns:
+        gdf[f"{column}_key"] = (
+            gdf[column].map(_normalize_name, na_action="ignore").astype("category")
+        )
+    return gdf
+
+
+def _read_base_map(url: str, columns: List[str]) -> gpd.GeoDataFrame:
+    """Read the given attribute columns (plus geometry) of a cached layer.
+    
+    With pyarrow installed, the shapefile archive is parsed once through
+    pyogrio's Arrow path and a GeoParquet copy is stored next to it; later
+    runs read that copy and skip shapefile parsing altogether. Like the
+    archive, the copy is written under a temporary name and renamed once
+    complete; a copy that cannot be read is rebuilt from the archive.
+    """
+    archive = _cached_download(url)
+    parquet = archive.with_suffix(".parquet")
+    if _HAS_ARROW and parquet.exists():
+        try:
+            return gpd.read_parquet(parquet, columns=[*columns, "geometry"])
+        except (OSError, ValueError):
+            pass  # corrupt or incompatible copy; rebuild it below
+    
+    gdf = gpd.read_file(archive, engine="pyogrio", columns=columns, use_arrow=_HAS_ARROW)
+    if _HAS_ARROW:
+        partial = parquet.with_name(parquet.name + ".part")
+        gdf.to_parquet(partial)
+        partial.replace(parquet)
+    return gdf
+
+
+@functools.lru_cache(maxsize=None)
+def _load_world() -> gpd.GeoDataFrame:
+    """Load the Natural Earth 110m countries, once per process."""
+    # Keep only what plotting needs; the file has ~170 attribute columns
+    world = _read_base_map(WORLD_URL, ["NAME"])[["NAME", "geometry"]]
+    return _with_match_keys(world, ["NAME"])
+
+
+@functools.lru_cache(maxsize=None)
+def _load_provinces() -> gpd.GeoDataFrame:
+    """Load the Natural Earth 10m states/provinces, once per process."""
+    provinces = _read_base_map(PROVINCES_URL, ["admin", "name"])
+    provinces = provinces[["admin", "name", "geometry"]]
+    return _with_match_keys(provinces, ["admin", "name"])
 
 
 def extract_locations(geo_data: List[Dict]) -> tuple[List[str], List[tuple[str, str]]]:
@@ -73,6 +191,37 @@ def extract_locations(geo_data: List[Dict]) -> tuple[List[str], List[tuple[str,
     return list(countries_only), country_province_pairs
 
 
+def _match_locations(
+    world: gpd.GeoDataFrame,
+    provinces: gpd.GeoDataFrame,
+    countries_only: List[str],
+    country_province_pairs: List[tuple[str, str]],
+) -> tuple[pd.Series, pd.Series]:
+    """Return boolean masks of the world and province rows to highlight.
+    
+    Names are compared through the normalized ``*_key`` columns added by
+    _with_match_keys(). The base maps are shared between calls, so they are
+    never modified here.
+    """
+    countries = {_normalize_name(country) for country in countries_only}
+    pairs = [
+        (_normalize_name(country), _normalize_name(province))
+        for country, province in country_province_pairs
+    ]
+    world_mask = world["NAME_key"].isin(countries)
+    # Match provinces on (country, province) in one pass, without copying the
+    # GeoDataFrame the way set_index() would
+    province_keys = pd.MultiIndex.from_arrays(
+        [provinces["admin_key"], provinces["name_key"]], names=["admin", "name"]
+    )
+    if pairs:
+        wanted = pd.MultiIndex.from_tuples(pairs, names=["admin", "name"])
+        province_mask = pd.Series(province_keys.isin(wanted), index=provinces.index)
+    else:
+        province_mask = pd.Series(False, index=provinces.index)
+    return world_mask, province_mask
+
+
 def plot_species_distribution(genus: str, species: str, save_path: str = None):
     """Create a world map visualization of a tree species' geographic distribution.
     
@@ -106,7 +255,9 @@ def plot_species_distribution(genus: str, species: str, save_path: str = None):
         
     Note:
         Requires internet connection to download base map data on first run.
-        Base maps are cached by GeoPandas for subsequent use.
+        The Natural Earth archives are then cached under ``~/.cache/pygts``
+        (or ``$PYGTS_CACHE_DIR``) and kept in memory for the rest of the
+        process.
         
     Raises:
         Does not raise exceptions. If species not found or data unavailable,
@@ -135,23 +286,12 @@ def plot_species_distribution(genus: str, species: str, save_path: str = None):
         for country, province in sorted(country_province_pairs):
             print(f"    - {country}: {province}")
 
-    # Load world map and provinces
-    world = gpd.read_file(
-        "https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip"
+    # Load world map and provinces (cached on disk and in memory)
+    world = _load_world()
+    provinces = _load_provinces()
+    world_mask, province_mask = _match_locations(
+        world, provinces, countries_only, country_province_pairs
     )
-    provinces = gpd.read_file(
-        "https://naciscdn.org/naturalearth/10m/cultural/ne_10m_admin_1_states_provinces.zip"
-    )
-
-    # Mark countries where entire country has the species
-    world["species_present"] = world["NAME"].isin(countries_only)
-
-    # Mark specific provinces
-    provinces["species_present"] = False
-    for country, province in country_province_pairs:
-        # Match provinces by both country and province name
-        mask = (provinces["admin"] == country) & (provinces["name"] == province)
-        provinces.loc[mask, "species_present"] = True
 
     # Create the plot
     fig, ax = plt.subplots(1, 1, figsize=(15, 10))
@@ -160,16 +300,18 @@ def plot_species_distribution(genus: str, species: str, save_path: str = None):
     world.plot(ax=ax, color="lightgray", edgecolor="black", linewidth=0.5)
 
     # Plot countries where entire country has species (darker green)
-    if world["species_present"].any():
-        world[world["species_present"]].plot(
+    if world_mask.any():
+        world[world_mask].plot(
             ax=ax, color="#2d8659", edgecolor="black", linewidth=0.5
         )
 
     # Plot specific provinces where species is present (lighter green)
-    if provinces["species_present"].any():
-        provinces[provinces["species_present"]].plot(
-            ax=ax, color="#5dba87", edgecolor="black", linewidth=0.3
-        )
+    if province_mask.any():
+        highlighted = provinces[province_mask]
+        if not save_path:
+            # 10m detail is invisible on screen; simplify to redraw faster
+            highlighted = highlighted.simplify(_DISPLAY_TOLERANCE)
+        highlighted.plot(ax=ax, color="#5dba87", edgecolor="black", linewidth=0.3)
 
     # Set title and remove axes
     plt.title(
@@ -1,176 +1,175 @@
 """Tests for CLI module."""
 
 import pytest
-import sys
-from unittest.mock import Mock, patch, MagicMock
-from io import StringIO
-from pygts.cli import cli_check, cli_fetch, cli_visualize, main
+from unittest.mock import Mock, patch
+from types import SimpleNamespace as NS
+from pygts.cli import cli_check, cli_fetch, cli_visualize, get_parser, main
+from pygts.data_fetcher import request_data, species_exists
+
+
+@pytest.fixture(scope="session")
+def parser():
+    """The CLI argument parser, built once per test session."""
+    return get_parser()
+
+
+@pytest.fixture(scope="module")
+def shared_mocks():
+    """One mock per CLI collaborator, reused by every test in this module."""
+    return {
+        "species_exists": Mock(spec=species_exists),
+        "request_data": Mock(spec=request_data),
+        # No spec: importing the real function would load geopandas/matplotlib
+        "plot_species_distribution": Mock(),
+    }
+
+
+def _install_mock(shared_mocks, monkeypatch, name):
+    """Patch pygts.cli.<name> with its shared mock and fully reset it afterwards."""
+    mock = shared_mocks[name]
+    monkeypatch.setattr(f"pygts.cli.{name}", mock)
+    yield mock
+    mock.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def mock_exists(shared_mocks, monkeypatch):
+    """Shared mock standing in for species_exists."""
+    yield from _install_mock(shared_mocks, monkeypatch, "species_exists")
+
+
+@pytest.fixture
+def mock_request(shared_mocks, monkeypatch):
+    """Shared mock standing in for request_data."""
+    yield from _install_mock(shared_mocks, monkeypatch, "request_data")
+
+
+@pytest.fixture
+def mock_plot(shared_mocks, monkeypatch):
+    """Shared mock standing in for plot_species_distribution."""
+    yield from _install_mock(shared_mocks, monkeypatch, "plot_species_distribution")
 
 
 class TestCliCheck:
     """Tests for cli_check function."""
     
-    @patch('pygts.cli.species_exists')
-    def test_existing_species_exits_zero(self, mock_exists):
-        """Test that existing species exits with code 0."""
-        mock_exists.return_value = True
-        args = Mock(genus="Abarema", species="cochliocarpos")
+    @pytest.mark.parametrize("exists, expected_code, expected_lines", [
+        (True, 0, ["✓", "Abarema cochliocarpos exists"]),
+        (False, 1, ["✗", "Abarema cochliocarpos not found"]),
+    ])
+    def test_exit_code_and_message(
+        self, mock_exists, capsys, exists, expected_code, expected_lines
+    ):
+        """Test exit status and printed message for found/missing species."""
+        mock_exists.return_value = exists
+        args = NS(genus="Abarema", species="cochliocarpos")
         
         with pytest.raises(SystemExit) as exc_info:
             cli_check(args)
         
-        assert exc_info.value.code == 0
-    
-    @patch('pygts.cli.species_exists')
-    def test_non_existing_species_exits_one(self, mock_exists):
-        """Test that non-existing species exits with code 1."""
-        mock_exists.return_value = False
-        args = Mock(genus="InvalidGenus", species="invalid")
-        
-        with pytest.raises(SystemExit) as exc_info:
-            cli_check(args)
-        
-        assert exc_info.value.code == 1
-    
-    @patch('pygts.cli.species_exists')
-    def test_prints_success_message(self, mock_exists, capsys):
-        """Test that success message is printed."""
-        mock_exists.return_value = True
-        args = Mock(genus="Abarema", species="cochliocarpos")
-        
-        with pytest.raises(SystemExit):
-            cli_check(args)
-        
+        assert exc_info.value.code == expected_code
         captured = capsys.readouterr()
-        assert "✓" in captured.out
-        assert "Abarema cochliocarpos exists" in captured.out
-    
-    @patch('pygts.cli.species_exists')
-    def test_prints_failure_message(self, mock_exists, capsys):
-        """Test that failure message is printed."""
-        mock_exists.return_value = False
-        args = Mock(genus="InvalidGenus", species="invalid")
-        
-        with pytest.raises(SystemExit):
-            cli_check(args)
-        
-        captured = capsys.readouterr()
-        assert "✗" in captured.out
-        assert "not found" in captured.out
+        missing = [line for line in expected_lines if line not in captured.out]
+        assert not missing, missing
 
 
 class TestCliFetch:
     """Tests for cli_fetch function."""
     
-    @patch('pygts.cli.request_data')
     def test_no_data_exits_one(self, mock_request):
         """Test that no data exits with code 1."""
         mock_request.return_value = None
-        args = Mock(genus="InvalidGenus", species="invalid", json=False)
+        args = NS(genus="InvalidGenus", species="invalid", json=False)
         
         with pytest.raises(SystemExit) as exc_info:
             cli_fetch(args)
         
         assert exc_info.value.code == 1
     
-    @patch('pygts.cli.request_data')
-    def test_displays_human_readable_output(self, mock_request, capsys):
-        """Test human-readable output format."""
+    @pytest.mark.parametrize("as_json, expected_lines", [
+        (False, [
+            "Geographic data for Abarema cochliocarpos",
+            "Total locations: 3",
+            "Brazil:",
+            "Bahia",
+            "Ceará",
+            "France:",
+        ]),
+        (True, ['"country": "Brazil"', '"province": "Bahia"']),
+    ], ids=["human", "json"])
+    def test_output_formats(self, mock_request, capsys, as_json, expected_lines):
+        """Test human-readable and JSON output formats."""
         mock_request.return_value = [
             {"country": "Brazil", "province": "Bahia"},
             {"country": "Brazil", "province": "Ceará"},
             {"country": "France", "province": None}
         ]
-        args = Mock(genus="Abarema", species="cochliocarpos", json=False)
+        args = NS(genus="Abarema", species="cochliocarpos", json=as_json)
         
         cli_fetch(args)
         
         captured = capsys.readouterr()
-        assert "Geographic data for Abarema cochliocarpos" in captured.out
-        assert "Total locations: 3" in captured.out
-        assert "Brazil:" in captured.out
-        assert "Bahia" in captured.out
-        assert "Ceará" in captured.out
-        assert "France:" in captured.out
+        missing = [line for line in expected_lines if line not in captured.out]
+        assert not missing, missing
     
-    @patch('pygts.cli.request_data')
-    def test_displays_json_output(self, mock_request, capsys):
-        """Test JSON output format."""
+    def test_groups_by_country(self, mock_request, capsys):
+        """Test that output is grouped by country."""
         mock_request.return_value = [
             {"country": "Brazil", "province": "Bahia"},
+            {"country": "Brazil", "province": "Ceará"},
             {"country": "France", "province": None}
         ]
-        args = Mock(genus="Abarema", species="cochliocarpos", json=True)
+        args = NS(genus="Test", species="test", json=False)
         
         cli_fetch(args)
         
         captured = capsys.readouterr()
-        assert '"country": "Brazil"' in captured.out
-        assert '"province": "Bahia"' in captured.out
+        # Check that Brazil appears before its provinces
+        brazil_idx = captured.out.find("Brazil:")
+        bahia_idx = captured.out.find("Bahia")
+        assert brazil_idx < bahia_idx
     
-    @patch('pygts.cli.request_data')
-    def test_groups_by_country(self, mock_request, capsys):
-        """Test that output is grouped by country."""
+    def test_lists_each_province_once(self, mock_request, capsys):
+        """Test that repeated provinces and missing countries are handled."""
         mock_request.return_value = [
             {"country": "Brazil", "province": "Bahia"},
-            {"country": "Brazil", "province": "Ceará"},
-            {"country": "France", "province": None}
+            {"country": "Brazil", "province": "Bahia"},
+            {"province": "Somewhere"}
         ]
-        args = Mock(genus="Test", species="test", json=False)
+        args = NS(genus="Abarema", species="cochliocarpos", json=False)
         
         cli_fetch(args)
         
         captured = capsys.readouterr()
-        # Check that Brazil appears before its provinces
-        brazil_idx = captured.out.find("Brazil:")
-        bahia_idx = captured.out.find("Bahia")
-        assert brazil_idx < bahia_idx
+        assert captured.out.count("- Bahia") == 1
+        assert "Unknown:" in captured.out
 
 
 class TestCliVisualize:
     """Tests for cli_visualize function."""
     
-    @patch('pygts.cli.plot_species_distribution')
-    def test_calls_plot_function(self, mock_plot):
-        """Test that plot function is called with correct arguments."""
-        args = Mock(genus="Abarema", species="cochliocarpos", output=None)
-        
-        cli_visualize(args)
-        
-        mock_plot.assert_called_once_with("Abarema", "cochliocarpos", save_path=None)
-    
-    @patch('pygts.cli.plot_species_distribution')
-    def test_calls_plot_with_save_path(self, mock_plot):
-        """Test that plot function receives save path."""
-        args = Mock(genus="Abarema", species="cochliocarpos", output="map.png")
-        
-        cli_visualize(args)
-        
-        mock_plot.assert_called_once_with("Abarema", "cochliocarpos", save_path="map.png")
-    
-    @patch('pygts.cli.plot_species_distribution')
-    def test_prints_save_confirmation(self, mock_plot, capsys):
-        """Test that save confirmation is printed."""
-        args = Mock(genus="Abarema", species="cochliocarpos", output="map.png")
+    @pytest.mark.parametrize("output", [None, "map.png"])
+    def test_calls_plot_function(self, mock_plot, output):
+        """Test that plot function receives the species and save path."""
+        args = NS(genus="Abarema", species="cochliocarpos", output=output)
         
         cli_visualize(args)
         
-        captured = capsys.readouterr()
-        assert "Map saved to map.png" in captured.out
+        mock_plot.assert_called_once_with("Abarema", "cochliocarpos", save_path=output)
     
-    @patch('pygts.cli.plot_species_distribution')
-    def test_prints_display_message(self, mock_plot, capsys):
-        """Test that display message is printed."""
-        args = Mock(genus="Abarema", species="cochliocarpos", output=None)
-        
-        cli_visualize(args)
+    def test_prints_confirmation(self, mock_plot, capsys):
+        """Test the user-facing display and save confirmations."""
+        cli_visualize(NS(genus="Abarema", species="cochliocarpos", output=None))
+        cli_visualize(NS(genus="Abarema", species="cochliocarpos", output="map.png"))
         
         captured = capsys.readouterr()
-        assert "Displaying map" in captured.out
+        expected = ["✓ Displaying map...", "✓ Map saved to map.png"]
+        missing = [line for line in expected if line not in captured.out]
+        assert not missing, missing
 
 
 class TestMainFunction:
-    """Tests for main function."""
+    """Tests for main function and command dispatch."""
     
     @patch('sys.argv', ['pygts'])
     def test_no_command_prints_help(self):
@@ -180,59 +179,49 @@ class TestMainFunction:
         
         assert exc_info.value.code == 1
     
-    @patch('sys.argv', ['pygts', 'check', 'Abarema', 'cochliocarpos'])
-    @patch('pygts.cli.species_exists')
-    def test_check_command_execution(self, mock_exists):
+    @patch('sys.argv', ['pygts', 'fetch', 'Abarema', 'cochliocarpos', '--json'])
+    def test_main_dispatches_command(self, mock_request, capsys):
+        """Test that main parses sys.argv and runs the selected command."""
+        mock_request.return_value = [{"country": "Brazil"}]
+        
+        main()
+        
+        mock_request.assert_called_once_with('Abarema', 'cochliocarpos')
+        captured = capsys.readouterr()
+        assert '"country": "Brazil"' in captured.out
+    
+    def test_check_command_execution(self, parser, mock_exists):
         """Test that check command is executed."""
         mock_exists.return_value = True
+        args = parser.parse_args(['check', 'Abarema', 'cochliocarpos'])
         
         with pytest.raises(SystemExit) as exc_info:
-            main()
+            args.func(args)
         
         mock_exists.assert_called_once_with('Abarema', 'cochliocarpos')
         assert exc_info.value.code == 0
     
-    @patch('sys.argv', ['pygts', 'fetch', 'Abarema', 'cochliocarpos'])
-    @patch('pygts.cli.request_data')
-    def test_fetch_command_execution(self, mock_request):
+    def test_fetch_command_execution(self, parser, mock_request):
         """Test that fetch command is executed."""
         mock_request.return_value = [{"country": "Brazil"}]
+        args = parser.parse_args(['fetch', 'Abarema', 'cochliocarpos'])
         
-        main()
+        args.func(args)
         
         mock_request.assert_called_once_with('Abarema', 'cochliocarpos')
-    
-    @patch('sys.argv', ['pygts', 'fetch', 'Abarema', 'cochliocarpos', '--json'])
-    @patch('pygts.cli.request_data')
-    def test_fetch_with_json_flag(self, mock_request, capsys):
-        """Test that JSON flag is processed."""
-        mock_request.return_value = [{"country": "Brazil"}]
-        
-        main()
-        
-        captured = capsys.readouterr()
-        assert '"country": "Brazil"' in captured.out
-    
-    @patch('sys.argv', ['pygts', 'visualize', 'Abarema', 'cochliocarpos'])
-    @patch('pygts.cli.plot_species_distribution')
-    def test_visualize_command_execution(self, mock_plot):
-        """Test that visualize command is executed."""
-        main()
-        
-        mock_plot.assert_called_once_with('Abarema', 'cochliocarpos', save_path=None)
-    
-    @patch('sys.argv', ['pygts', 'viz', 'Abarema', 'cochliocarpos', '-o', 'map.png'])
-    @patch('pygts.cli.plot_species_distribution')
-    def test_viz_alias_works(self, mock_plot):
-        """Test that 'viz' alias works."""
-        main()
-        
-        mock_plot.assert_called_once_with('Abarema', 'cochliocarpos', save_path='map.png')
-    
-    @patch('sys.argv', ['pygts', 'visualize', 'Abarema', 'cochliocarpos', '--output', 'map.png'])
-    @patch('pygts.cli.plot_species_distribution')
-    def test_output_long_form(self, mock_plot):
-        """Test that --output long form works."""
-        main()
-        
-        mock_plot.assert_called_once_with('Abarema', 'cochliocarpos', save_path='map.png')
+        assert args.json is False
+    
+    @pytest.mark.parametrize("argv, expected_output", [
+        (['visualize', 'Abarema', 'cochliocarpos'], None),
+        (['viz', 'Abarema', 'cochliocarpos', '-o', 'map.png'], 'map.png'),
+        (['visualize', 'Abarema', 'cochliocarpos', '--output', 'map.png'], 'map.png'),
+    ], ids=["visualize", "viz-alias", "output-long-form"])
+    def test_visualize_command_execution(self, parser, mock_plot, argv, expected_output):
+        """Test the visualize command, its 'viz' alias and both output flags."""
+        args = parser.parse_args(argv)
+        
+        args.func(args)
+        
+        mock_plot.assert_called_once_with(
+            'Abarema', 'cochliocarpos', save_path=expected_output
+        )
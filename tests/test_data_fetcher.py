@@ -1,59 +1,185 @@
 """Tests for data_fetcher module."""
 
+import json
+import threading
+import time
+
 import pandas as pd
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from pygts.data_fetcher import species_exists, request_data, fetch_species_data_parallel
+import requests
+from tqdm import tqdm
+from unittest.mock import Mock, patch
+from pygts.data_fetcher import (
+    _EXISTS_CACHE,
+    _MAX_PER_HOST,
+    _SESSION,
+    configure_session,
+    species_exists,
+    request_data,
+    fetch_species_data_parallel,
+)
+
+
+@pytest.fixture(scope="class")
+def two_row_df():
+    """Two distinct, well-known species; built once per test class."""
+    return pd.DataFrame({
+        "Genus": ["Abarema", "Abies"],
+        "Species": ["cochliocarpos", "alba"]
+    })
+
+
+class TestConfigureSession:
+    """Tests for configure_session function."""
+    
+    def test_resizes_connection_pool(self):
+        """Test that both adapters get the requested pool size."""
+        configure_session(4)
+        try:
+            for prefix in ("https://", "http://"):
+                assert _SESSION.adapters[prefix]._pool_maxsize == 4
+        finally:
+            configure_session()
+    
+    def test_adapter_retries_on_server_errors(self):
+        """Test that the adapter retries rate-limit and server errors."""
+        retries = _SESSION.adapters["https://"].max_retries
+        assert retries.total == 3
+        assert {429, 500, 502, 503, 504} <= set(retries.status_forcelist)
 
 
 class TestSpeciesExists:
     """Tests for species_exists function."""
     
-    def test_existing_species_returns_true(self):
+    @pytest.fixture(autouse=True)
+    def clear_exists_cache(self):
+        """Start every test with an empty species_exists cache."""
+        _EXISTS_CACHE.clear()
+        yield
+        _EXISTS_CACHE.clear()
+    
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_existing_species_returns_true(self, mock_get):
         """Test that an existing species returns True."""
+        mock_response = Mock(status_code=200)
+        payload = {"results": [{"TSGeolinks": [{"country": "Brazil", "province": "Bahia"}]}]}
+        mock_response.content = json.dumps(payload).encode()
+        mock_get.return_value = mock_response
+        
         result = species_exists("Abarema", "cochliocarpos")
         assert result is True
     
-    def test_invalid_species_returns_false(self):
-        """Test that an invalid species returns False."""
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_invalid_species_returns_false(self, mock_get):
+        """Test that an HTTP error for an unknown species returns False."""
+        mock_response = Mock(status_code=404)
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        mock_get.return_value = mock_response
+        
         result = species_exists("InvalidGenus", "invalid_species")
         assert result is False
     
-    @patch('pygts.data_fetcher.requests.get')
+    @patch('pygts.data_fetcher._SESSION.get')
     def test_network_error_returns_false(self, mock_get):
         """Test that network errors return False gracefully."""
         mock_get.side_effect = Exception("Network error")
         result = species_exists("Abarema", "cochliocarpos")
         assert result is False
     
-    @patch('pygts.data_fetcher.requests.get')
+    @patch('pygts.data_fetcher._SESSION.get')
     def test_empty_results_returns_false(self, mock_get):
         """Test that empty results return False."""
         mock_response = Mock()
-        mock_response.json.return_value = {"results": []}
+        payload = {"results": []}
+        mock_response.content = json.dumps(payload).encode()
         mock_get.return_value = mock_response
         
         result = species_exists("Abarema", "cochliocarpos")
         assert result is False
     
-    @patch('pygts.data_fetcher.requests.get')
+    @patch('pygts.data_fetcher._SESSION.get')
     def test_valid_response_returns_true(self, mock_get):
         """Test that valid API response returns True."""
         mock_response = Mock()
-        mock_response.json.return_value = {
+        payload = {
             "results": [{"TSGeolinks": [{"country": "Brazil"}]}]
         }
+        mock_response.content = json.dumps(payload).encode()
         mock_get.return_value = mock_response
         
         result = species_exists("Abarema", "cochliocarpos")
         assert result is True
+    
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_partial_response_is_enough(self, mock_get):
+        """Test that a truncated 206 body is decided without a second request."""
+        mock_response = Mock(status_code=206)
+        mock_response.content = b'{"results": [{"TSGeolinks": [{"country": "Bra'
+        mock_get.return_value = mock_response
+        
+        assert species_exists("Abarema", "cochliocarpos") is True
+        assert mock_get.call_count == 1
+        assert "Range" in mock_get.call_args.kwargs["headers"]
+    
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_inconclusive_partial_response_refetches(self, mock_get):
+        """Test fallback to a full request when the partial body is unclear."""
+        partial = Mock(status_code=206, content=b'{"meta": {"source": "BG')
+        full = Mock(status_code=200, content=json.dumps({"results": []}).encode())
+        mock_get.side_effect = [partial, full]
+        
+        assert species_exists("Abarema", "cochliocarpos") is False
+        assert mock_get.call_count == 2
+    
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_nested_results_key_in_partial_refetches(self, mock_get):
+        """Test that only a top-level "results" array decides a partial body."""
+        partial = Mock(
+            status_code=206,
+            content=b'{"meta": {"results": [{"id": 1}]}, "results": [], "pad": "',
+        )
+        full = Mock(
+            status_code=200,
+            content=json.dumps({"meta": {"results": [{"id": 1}]}, "results": []}).encode(),
+        )
+        mock_get.side_effect = [partial, full]
+        
+        assert species_exists("Abarema", "cochliocarpos") is False
+        assert mock_get.call_count == 2
+    
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_result_is_cached(self, mock_get):
+        """Test that a species is only looked up once per process."""
+        mock_response = Mock(status_code=200)
+        mock_response.content = json.dumps({"results": [{"TSGeolinks": []}]}).encode()
+        mock_get.return_value = mock_response
+        
+        assert species_exists("Abarema", "cochliocarpos") is True
+        assert species_exists("Abarema", "cochliocarpos") is True
+        assert mock_get.call_count == 1
+    
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_network_error_is_not_cached(self, mock_get):
+        """Test that transient failures are retried on the next call."""
+        mock_response = Mock(status_code=200)
+        mock_response.content = json.dumps({"results": [{"TSGeolinks": []}]}).encode()
+        mock_get.side_effect = [Exception("Network error"), mock_response]
+        
+        assert species_exists("Abarema", "cochliocarpos") is False
+        assert species_exists("Abarema", "cochliocarpos") is True
 
 
 class TestRequestData:
     """Tests for request_data function."""
     
-    def test_existing_species_returns_data(self):
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_existing_species_returns_data(self, mock_get):
         """Test that an existing species returns data."""
+        mock_response = Mock()
+        payload = {"results": [{"TSGeolinks": [{"country": "Brazil", "province": "Bahia"}]}]}
+        mock_response.content = json.dumps(payload).encode()
+        mock_get.return_value = mock_response
+        
         result = request_data("Abarema", "cochliocarpos")
         assert result is not None
         assert isinstance(result, list)
@@ -61,43 +187,49 @@ class TestRequestData:
         # Check data structure
         assert "country" in result[0]
     
-    def test_invalid_species_returns_none(self):
-        """Test that an invalid species returns None."""
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_invalid_species_returns_none(self, mock_get):
+        """Test that an HTTP error for an unknown species returns None."""
+        mock_response = Mock()
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        mock_get.return_value = mock_response
+        
         result = request_data("InvalidGenus", "invalid_species")
         assert result is None
     
-    @patch('pygts.data_fetcher.requests.get')
+    @patch('pygts.data_fetcher._SESSION.get')
     def test_network_error_returns_none(self, mock_get):
         """Test that network errors return None gracefully."""
         mock_get.side_effect = Exception("Network error")
         result = request_data("Abarema", "cochliocarpos")
         assert result is None
     
-    @patch('pygts.data_fetcher.requests.get')
+    @patch('pygts.data_fetcher._SESSION.get')
     def test_malformed_json_returns_none(self, mock_get):
         """Test that malformed JSON returns None."""
         mock_response = Mock()
-        mock_response.json.side_effect = ValueError("Invalid JSON")
+        mock_response.content = b"<html>Invalid JSON</html>"
         mock_get.return_value = mock_response
         
         result = request_data("Abarema", "cochliocarpos")
         assert result is None
     
-    @patch('pygts.data_fetcher.requests.get')
+    @patch('pygts.data_fetcher._SESSION.get')
     def test_empty_results_returns_none(self, mock_get):
         """Test that empty results return None."""
         mock_response = Mock()
-        mock_response.json.return_value = {"results": []}
+        payload = {"results": []}
+        mock_response.content = json.dumps(payload).encode()
         mock_get.return_value = mock_response
         
         result = request_data("Abarema", "cochliocarpos")
         assert result is None
     
-    @patch('pygts.data_fetcher.requests.get')
+    @patch('pygts.data_fetcher._SESSION.get')
     def test_valid_response_structure(self, mock_get):
         """Test that valid response has correct structure."""
         mock_response = Mock()
-        mock_response.json.return_value = {
+        payload = {
             "results": [{
                 "TSGeolinks": [
                     {"country": "Brazil", "province": "Bahia", "uncertainty": None},
@@ -105,6 +237,7 @@ class TestRequestData:
                 ]
             }]
         }
+        mock_response.content = json.dumps(payload).encode()
         mock_get.return_value = mock_response
         
         result = request_data("Abarema", "cochliocarpos")
@@ -112,6 +245,36 @@ class TestRequestData:
         assert len(result) == 2
         assert result[0]["country"] == "Brazil"
         assert result[0]["province"] == "Bahia"
+    
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_location_strings_are_shared(self, mock_get):
+        """Test that repeated location names are interned across responses."""
+        mock_response = Mock()
+        payload = {"results": [{"TSGeolinks": [{"country": "Brazil", "province": "Bahia"}]}]}
+        mock_response.content = json.dumps(payload).encode()
+        mock_get.return_value = mock_response
+        
+        first = request_data("Abarema", "cochliocarpos")
+        second = request_data("Abarema", "cochliocarpos")
+        
+        assert first[0]["country"] is second[0]["country"]
+        assert first[0]["province"] is second[0]["province"]
+    
+    @pytest.mark.parametrize("payload", [
+        {},
+        {"results": {}},
+        {"results": ["not a dict"]},
+        {"results": [{"TSGeolinks": []}]},
+        [],
+    ])
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_unexpected_structure_returns_none(self, mock_get, payload):
+        """Test that unexpected response shapes are treated as no data."""
+        mock_response = Mock()
+        mock_response.content = json.dumps(payload).encode()
+        mock_get.return_value = mock_response
+        
+        assert request_data("Abarema", "cochliocarpos") is None
 
 
 class TestFetchSpeciesDataParallel:
@@ -123,79 +286,194 @@ class TestFetchSpeciesDataParallel:
         result = fetch_species_data_parallel(df)
         assert result == []
     
+    @pytest.mark.parametrize("rows, side_effect, expected", [
+        pytest.param(
+            [("Abarema", "cochliocarpos")],
+            lambda genus, species: [{"country": "Brazil"}],
+            [[{"country": "Brazil"}]],
+            id="single-species",
+        ),
+        pytest.param(
+            [("Abarema", "cochliocarpos"), ("Abies", "alba"), ("InvalidGenus", "invalid")],
+            lambda genus, species: {
+                "Abarema": [{"country": "Brazil"}],
+                "Abies": [{"country": "France"}],
+            }.get(genus),
+            [[{"country": "Brazil"}], [{"country": "France"}], None],
+            id="keeps-order",
+        ),
+        pytest.param(
+            [("Abarema", "cochliocarpos"), ("InvalidGenus", "invalid")],
+            lambda genus, species: [{"country": "Brazil"}] if genus == "Abarema" else None,
+            [[{"country": "Brazil"}], None],
+            id="failure-does-not-break-batch",
+        ),
+        pytest.param(
+            [("Abarema", "cochliocarpos")],
+            Exception("Unexpected error"),
+            [{"error": "Unexpected error"}],
+            id="exception-recorded",
+        ),
+    ])
     @patch('pygts.data_fetcher.request_data')
-    def test_single_species_success(self, mock_request):
-        """Test successful fetch for single species."""
+    def test_results_follow_input_rows(self, mock_request, rows, side_effect, expected):
+        """Test per-row results for successes, misses and raised exceptions."""
+        mock_request.side_effect = side_effect
+        
+        df = pd.DataFrame(rows, columns=["Genus", "Species"])
+        
+        results = fetch_species_data_parallel(df, max_workers=2)
+        assert results == expected
+    
+    @patch('pygts.data_fetcher.request_data')
+    def test_non_default_index_uses_row_positions(self, mock_request, two_row_df):
+        """Test that results are ordered by row position, not index label."""
+        mock_request.side_effect = lambda genus, species: [{"country": genus}]
+        
+        df = two_row_df.set_axis([10, 5])
+        
+        results = fetch_species_data_parallel(df, max_workers=2)
+        assert results == [[{"country": "Abarema"}], [{"country": "Abies"}]]
+    
+    @patch('pygts.data_fetcher.request_data')
+    def test_duplicate_species_requested_once(self, mock_request):
+        """Test that repeated species are fetched once and fanned back out."""
+        mock_request.side_effect = lambda genus, species: [{"country": genus}]
+        
+        df = pd.DataFrame({
+            "Genus": ["Abarema", "Abies", "Abarema"],
+            "Species": ["cochliocarpos", "alba", "cochliocarpos"]
+        })
+        
+        results = fetch_species_data_parallel(df, max_workers=2)
+        assert mock_request.call_count == 2
+        assert results[0] == results[2] == [{"country": "Abarema"}]
+        assert results[1] == [{"country": "Abies"}]
+    
+    @pytest.mark.parametrize("count", [1, 5])
+    @patch('pygts.data_fetcher.request_data')
+    def test_progress_bar_reaches_total(self, mock_request, monkeypatch, count):
+        """Test that the progress bar records every distinct species."""
         mock_request.return_value = [{"country": "Brazil"}]
+        bars = []
+        
+        def recording_tqdm(*args, **kwargs):
+            bars.append(tqdm(*args, **kwargs))
+            return bars[-1]
         
+        monkeypatch.setattr('pygts.data_fetcher.tqdm', recording_tqdm)
         df = pd.DataFrame({
-            "Genus": ["Abarema"],
-            "Species": ["cochliocarpos"]
+            "Genus": ["Abies"] * count,
+            "Species": [f"species{i}" for i in range(count)]
         })
         
-        results = fetch_species_data_parallel(df, max_workers=1)
-        assert len(results) == 1
-        assert results[0] == [{"country": "Brazil"}]
+        fetch_species_data_parallel(df, max_workers=2)
+        assert bars[0].n == bars[0].total == count
     
     @patch('pygts.data_fetcher.request_data')
-    def test_multiple_species_maintains_order(self, mock_request):
-        """Test that results maintain input order."""
+    def test_exception_keeps_other_results(self, mock_request):
+        """Test that one species raising does not drop the other results."""
         def mock_response(genus, species):
-            if genus == "Abarema":
-                return [{"country": "Brazil"}]
-            elif genus == "Abies":
-                return [{"country": "France"}]
-            return None
+            if genus == "Broken":
+                raise RuntimeError("boom")
+            return [{"country": genus}]
         
         mock_request.side_effect = mock_response
-        
         df = pd.DataFrame({
-            "Genus": ["Abarema", "Abies", "InvalidGenus"],
-            "Species": ["cochliocarpos", "alba", "invalid"]
+            "Genus": ["Abarema", "Broken", "Abies"],
+            "Species": ["cochliocarpos", "genus", "alba"]
         })
         
         results = fetch_species_data_parallel(df, max_workers=2)
-        assert len(results) == 3
-        assert results[0] == [{"country": "Brazil"}]
-        assert results[1] == [{"country": "France"}]
-        assert results[2] is None
+        assert results == [
+            [{"country": "Abarema"}],
+            {"error": "boom"},
+            [{"country": "Abies"}],
+        ]
     
     @patch('pygts.data_fetcher.request_data')
-    def test_handles_failures_gracefully(self, mock_request):
-        """Test that failures don't break the entire batch."""
-        def mock_response(genus, species):
-            if genus == "Abarema":
-                return [{"country": "Brazil"}]
-            return None
+    def test_small_batch_keeps_connection_pool(self, mock_request):
+        """Test that a one-species batch does not shrink the shared pool."""
+        mock_request.return_value = [{"country": "Brazil"}]
+        adapter = _SESSION.adapters["https://"]
         
-        mock_request.side_effect = mock_response
+        fetch_species_data_parallel(
+            pd.DataFrame({"Genus": ["Abarema"], "Species": ["cochliocarpos"]})
+        )
+        
+        assert _SESSION.adapters["https://"] is adapter
+        assert adapter._pool_maxsize >= _MAX_PER_HOST
+    
+    @patch('pygts.data_fetcher.os.cpu_count', return_value=8)
+    @patch('pygts.data_fetcher._SESSION.get')
+    def test_in_flight_requests_bounded_per_host(self, mock_get, mock_cpu_count):
+        """Test that no more than _MAX_PER_HOST requests run at once."""
+        lock = threading.Lock()
+        in_flight = peak = 0
         
+        def slow_get(url, timeout):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+            response = Mock(status_code=200)
+            response.content = b'{"results": []}'
+            return response
+        
+        mock_get.side_effect = slow_get
         df = pd.DataFrame({
-            "Genus": ["Abarema", "InvalidGenus"],
-            "Species": ["cochliocarpos", "invalid"]
+            "Genus": ["Abies"] * 20,
+            "Species": [f"species{i}" for i in range(20)]
         })
         
-        results = fetch_species_data_parallel(df, max_workers=1)
-        assert len(results) == 2
-        assert results[0] is not None
-        assert results[1] is None
+        fetch_species_data_parallel(df, max_workers=20)
+        assert mock_get.call_count == 20
+        assert peak == _MAX_PER_HOST
     
+    @pytest.mark.parametrize("cpu_count, max_workers, expected_workers", [
+        (1, 10, 4),
+        (None, 10, 4),
+        (2, 10, 6),
+        (1, None, 4),
+        (8, None, 6),
+    ])
     @patch('pygts.data_fetcher.request_data')
-    def test_exception_handling(self, mock_request):
-        """Test that exceptions are caught and recorded."""
-        mock_request.side_effect = Exception("Unexpected error")
+    def test_workers_capped_per_cpu(
+        self, mock_request, capsys, cpu_count, max_workers, expected_workers
+    ):
+        """Test that at most four workers per CPU are started."""
+        mock_request.return_value = [{"country": "Brazil"}]
+        df = pd.DataFrame({
+            "Genus": ["Abies"] * 6,
+            "Species": [f"species{i}" for i in range(6)]
+        })
+        
+        with patch('pygts.data_fetcher.os.cpu_count', return_value=cpu_count):
+            fetch_species_data_parallel(df, max_workers=max_workers)
+        
+        captured = capsys.readouterr()
+        assert f"Fetching 6 species with {expected_workers} workers" in captured.out
+    
+    @patch('pygts.data_fetcher.request_data')
+    def test_workers_capped_by_distinct_species(self, mock_request, capsys):
+        """Test that no more workers than distinct species are started."""
+        mock_request.return_value = [{"country": "Brazil"}]
         
         df = pd.DataFrame({
-            "Genus": ["Abarema"],
-            "Species": ["cochliocarpos"]
+            "Genus": ["Abarema", "Abarema"],
+            "Species": ["cochliocarpos", "cochliocarpos"]
         })
         
-        results = fetch_species_data_parallel(df, max_workers=1)
-        assert len(results) == 1
-        assert isinstance(results[0], dict)
-        assert "error" in results[0]
+        fetch_species_data_parallel(df, max_workers=10)
+        
+        captured = capsys.readouterr()
+        assert "Fetching 1 species with 1 workers" in captured.out
 
 
+@pytest.mark.integration
 class TestIntegration:
     """Integration tests using real API."""
     
@@ -211,14 +489,14 @@ class TestIntegration:
         assert len(data) > 0
         assert "country" in data[0]
     
-    def test_parallel_fetch_real_species(self):
+    def test_real_invalid_species(self):
+        """Test that an unknown species is reported as missing."""
+        assert species_exists("InvalidGenus", "invalid_species") is False
+        assert request_data("InvalidGenus", "invalid_species") is None
+    
+    def test_parallel_fetch_real_species(self, two_row_df):
         """Test parallel fetching with real species."""
-        df = pd.DataFrame({
-            "Genus": ["Abarema", "Abies"],
-            "Species": ["cochliocarpos", "alba"]
-        })
-        
-        results = fetch_species_data_parallel(df, max_workers=2)
+        results = fetch_species_data_parallel(two_row_df, max_workers=2)
         assert len(results) == 2
         assert all(r is not None for r in results)
         assert all(isinstance(r, list) for r in results)
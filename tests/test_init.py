@@ -0,0 +1,41 @@
+"""Tests for the pygts package namespace."""
+
+import subprocess
+import sys
+
+import pytest
+
+
+def _run(code):
+    """Run ``code`` in a fresh interpreter and return its stdout."""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+class TestLazyImports:
+    """Tests for the lazily loaded visualizer."""
+    
+    def test_import_does_not_load_mapping_libraries(self):
+        """Test that importing pygts leaves geopandas and matplotlib unloaded."""
+        out = _run(
+            "import sys, pygts; "
+            "print('geopandas' in sys.modules, 'matplotlib' in sys.modules)"
+        )
+        assert out == "False False"
+    
+    def test_plot_species_distribution_still_importable(self):
+        """Test that the lazy attribute resolves to the visualizer function."""
+        out = _run(
+            "from pygts import plot_species_distribution; "
+            "print(plot_species_distribution.__module__)"
+        )
+        assert out == "pygts.visualizer"
+    
+    def test_unknown_attribute_raises(self):
+        """Test that other missing attributes still raise AttributeError."""
+        import pygts
+        
+        with pytest.raises(AttributeError):
+            pygts.not_a_function
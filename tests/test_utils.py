@@ -4,121 +4,102 @@ import pytest
 import pandas as pd
 from pathlib import Path
 from pygts.utils import load_species_data
-import tempfile
-import os
+
+
+@pytest.fixture
+def make_csv(tmp_path):
+    """Return a helper that writes ``content`` to a CSV file and returns its path."""
+    def _make_csv(content: str) -> Path:
+        path = tmp_path / "species.csv"
+        path.write_text(content, encoding="utf-8")
+        return path
+    return _make_csv
+
+
+@pytest.fixture
+def missing_csv(tmp_path):
+    """Return a path inside tmp_path that is guaranteed not to exist."""
+    return tmp_path / "nonexistent_file.csv"
+
+
+@pytest.fixture(scope="session")
+def sample_data():
+    """Load the bundled sample data file once per session, or None if absent."""
+    data_path = Path("data/global_tree_search_trees_1_9.csv")
+    if not data_path.exists():
+        return None
+    return load_species_data(data_path)
 
 
 class TestLoadSpeciesData:
     """Tests for load_species_data function."""
     
-    def test_loads_csv_correctly(self):
-        """Test that CSV is loaded and parsed correctly."""
-        # Create temporary CSV
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write("TaxonName\n")
-            f.write("Abarema cochliocarpos\n")
-            f.write("Abies alba\n")
-            temp_path = f.name
+    @pytest.mark.parametrize("csv_body, expected_genus, expected_species, path_type", [
+        pytest.param(
+            "TaxonName\nAbarema cochliocarpos\nAbies alba\n",
+            ["Abarema", "Abies"], ["cochliocarpos", "alba"], str,
+            id="two-rows",
+        ),
+        pytest.param(
+            "TaxonName\nAbarema cochliocarpos\n",
+            ["Abarema"], ["cochliocarpos"], Path,
+            id="path-object",
+        ),
+        pytest.param(
+            "TaxonName\nAbarema cochliocarpos var. something\n",
+            ["Abarema"], ["cochliocarpos"], str,
+            id="multiword-name",
+        ),
+        pytest.param(
+            "Id,TaxonName,Author\n1,Abies alba,Mill.\n",
+            ["Abies"], ["alba"], str,
+            id="other-columns",
+        ),
+        pytest.param("TaxonName\n", [], [], str, id="empty"),
+    ])
+    def test_loads_and_splits_names(
+        self, make_csv, csv_body, expected_genus, expected_species, path_type
+    ):
+        """Test that names are split into Genus/Species and TaxonName is kept."""
+        path = make_csv(csv_body)
         
-        try:
-            df = load_species_data(temp_path)
-            
-            assert len(df) == 2
-            assert list(df.columns) == ["TaxonName", "Genus", "Species"]
-            assert df.iloc[0]["Genus"] == "Abarema"
-            assert df.iloc[0]["Species"] == "cochliocarpos"
-            assert df.iloc[1]["Genus"] == "Abies"
-            assert df.iloc[1]["Species"] == "alba"
-        finally:
-            os.unlink(temp_path)
-    
-    def test_accepts_path_object(self):
-        """Test that function accepts Path object."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write("TaxonName\n")
-            f.write("Abarema cochliocarpos\n")
-            temp_path = f.name
+        df = load_species_data(path_type(path))
         
-        try:
-            df = load_species_data(Path(temp_path))
-            assert len(df) == 1
-        finally:
-            os.unlink(temp_path)
+        assert list(df.columns) == ["TaxonName", "Genus", "Species"]
+        assert len(df) == len(expected_genus)
+        assert df["Genus"].tolist() == expected_genus
+        assert df["Species"].tolist() == expected_species
+        assert df["TaxonName"].tolist() == pd.read_csv(path)["TaxonName"].tolist()
     
-    def test_missing_file_raises_error(self):
+    def test_missing_file_raises_error(self, missing_csv):
         """Test that missing file raises FileNotFoundError."""
         with pytest.raises(FileNotFoundError):
-            load_species_data("nonexistent_file.csv")
+            load_species_data(missing_csv)
     
-    def test_missing_taxon_column_raises_error(self):
+    def test_missing_taxon_column_raises_error(self, make_csv):
         """Test that missing TaxonName column raises KeyError."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write("WrongColumn\n")
-            f.write("Abarema cochliocarpos\n")
-            temp_path = f.name
-        
-        try:
-            with pytest.raises(KeyError):
-                load_species_data(temp_path)
-        finally:
-            os.unlink(temp_path)
-    
-    def test_handles_multiword_species_names(self):
-        """Test that only first two words are used."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write("TaxonName\n")
-            f.write("Abarema cochliocarpos var. something\n")
-            temp_path = f.name
-        
-        try:
-            df = load_species_data(temp_path)
-            assert df.iloc[0]["Genus"] == "Abarema"
-            assert df.iloc[0]["Species"] == "cochliocarpos"
-        finally:
-            os.unlink(temp_path)
+        with pytest.raises(KeyError):
+            load_species_data(make_csv("WrongColumn\nAbarema cochliocarpos\n"))
     
-    def test_empty_csv_returns_empty_dataframe(self):
-        """Test that empty CSV returns empty DataFrame."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write("TaxonName\n")
-            temp_path = f.name
-        
-        try:
-            df = load_species_data(temp_path)
-            assert len(df) == 0
-            assert list(df.columns) == ["TaxonName", "Genus", "Species"]
-        finally:
-            os.unlink(temp_path)
-    
-    def test_preserves_original_taxon_name(self):
-        """Test that original TaxonName is preserved."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-            f.write("TaxonName\n")
-            f.write("Abarema cochliocarpos\n")
-            temp_path = f.name
-        
-        try:
-            df = load_species_data(temp_path)
-            assert df.iloc[0]["TaxonName"] == "Abarema cochliocarpos"
-        finally:
-            os.unlink(temp_path)
+    def test_single_word_name_raises_error(self, make_csv):
+        """Test that a name without a species epithet raises IndexError."""
+        with pytest.raises(IndexError):
+            load_species_data(make_csv("TaxonName\nAbarema\n"))
 
 
 class TestUtilsIntegration:
     """Integration tests for utils with real data file."""
     
-    def test_load_sample_data_file(self):
+    def test_load_sample_data_file(self, sample_data):
         """Test loading the actual sample data file if it exists."""
-        data_path = Path("data/global_tree_search_trees_1_9.csv")
+        if sample_data is None:
+            pytest.skip("sample data file not present")
+        
+        assert len(sample_data) > 0
+        assert "TaxonName" in sample_data.columns
+        assert "Genus" in sample_data.columns
+        assert "Species" in sample_data.columns
         
-        if data_path.exists():
-            df = load_species_data(data_path)
-            
-            assert len(df) > 0
-            assert "TaxonName" in df.columns
-            assert "Genus" in df.columns
-            assert "Species" in df.columns
-            
-            # Verify data structure
-            assert all(isinstance(x, str) for x in df["Genus"])
-            assert all(isinstance(x, str) for x in df["Species"])
+        # Verify data structure
+        assert all(isinstance(x, str) for x in sample_data["Genus"])
+        assert all(isinstance(x, str) for x in sample_data["Species"])
@@ -1,8 +1,87 @@
 """Tests for visualizer module."""
 
+import itertools
+import geopandas as gpd
 import pytest
-from unittest.mock import Mock, patch, MagicMock, call
-from pygts.visualizer import extract_locations, plot_species_distribution
+from types import SimpleNamespace
+from shapely.geometry import box
+from unittest.mock import Mock, patch, MagicMock
+from pygts import visualizer
+from pygts.visualizer import (
+    _cached_download,
+    _match_locations,
+    _normalize_name,
+    _with_match_keys,
+    extract_locations,
+    plot_species_distribution,
+)
+
+
+@pytest.fixture(scope="module")
+def shared_mocks():
+    """Mocks reused by every test in this module, reset after each one."""
+    return SimpleNamespace(
+        world=MagicMock(),
+        provinces=MagicMock(),
+        read_file=Mock(),
+        show=Mock(),
+        savefig=Mock(),
+        request_data=Mock(),
+    )
+
+
+@pytest.fixture
+def map_env(shared_mocks, tmp_path, monkeypatch):
+    """Patch gpd.read_file (world, then provinces) and plt.show.
+    
+    Base maps are also kept off the network and out of the in-memory cache:
+    archives resolve under tmp_path, and the GeoParquet copy is disabled so
+    tests never write next to the checkout; the parquet tests re-enable it.
+    """
+    visualizer._load_world.cache_clear()
+    visualizer._load_provinces.cache_clear()
+    monkeypatch.setattr(visualizer, "_HAS_ARROW", False)
+    monkeypatch.setattr(
+        visualizer, "_cached_download", lambda url: tmp_path / url.rsplit("/", 1)[-1]
+    )
+    maps = itertools.cycle((shared_mocks.world, shared_mocks.provinces))
+    shared_mocks.read_file.side_effect = lambda *args, **kwargs: next(maps)
+    monkeypatch.setattr(visualizer.gpd, "read_file", shared_mocks.read_file)
+    monkeypatch.setattr(visualizer.plt, "show", shared_mocks.show)
+    yield shared_mocks
+    for mock in vars(shared_mocks).values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    visualizer._load_world.cache_clear()
+    visualizer._load_provinces.cache_clear()
+
+
+@pytest.fixture
+def plot_env(map_env, monkeypatch):
+    """map_env with request_data patched as well, for offline plotting tests."""
+    monkeypatch.setattr(visualizer, "request_data", map_env.request_data)
+    return map_env
+
+
+@pytest.fixture
+def mock_savefig(plot_env, monkeypatch):
+    """Shared mock standing in for plt.savefig."""
+    monkeypatch.setattr(visualizer.plt, "savefig", plot_env.savefig)
+    return plot_env.savefig
+
+
+@pytest.fixture
+def real_base_maps():
+    """Small real world and provinces GeoDataFrames, in read order."""
+    return [
+        gpd.GeoDataFrame(
+            {"NAME": ["France", "Brazil"], "POP_EST": [68, 216]},
+            geometry=[box(0, 40, 5, 50), box(-60, -20, -40, 0)],
+        ),
+        gpd.GeoDataFrame(
+            {"admin": ["Brazil"], "name": ["Bahia"], "iso_a2": ["BR"]},
+            geometry=[box(-45, -15, -40, -10)],
+        ),
+    ]
 
 
 class TestExtractLocations:
@@ -74,136 +153,293 @@ class TestExtractLocations:
 class TestPlotSpeciesDistribution:
     """Tests for plot_species_distribution function."""
     
-    @patch('pygts.visualizer.request_data')
-    def test_no_data_returns_early(self, mock_request, capsys):
+    def test_no_data_returns_early(self, plot_env, capsys):
         """Test that function returns early when no data is available."""
-        mock_request.return_value = None
+        plot_env.request_data.return_value = None
         
         plot_species_distribution("InvalidGenus", "invalid")
         
         captured = capsys.readouterr()
         assert "No geographical data found" in captured.out
     
-    @patch('pygts.visualizer.request_data')
-    def test_empty_locations_returns_early(self, mock_request, capsys):
+    def test_empty_locations_returns_early(self, plot_env, capsys):
         """Test that function returns early when locations are empty."""
-        mock_request.return_value = [{"country": None, "province": None}]
+        plot_env.request_data.return_value = [{"country": None, "province": None}]
         
         plot_species_distribution("InvalidGenus", "invalid")
         
         captured = capsys.readouterr()
         assert "No location data found" in captured.out
     
-    @patch('pygts.visualizer.plt.show')
-    @patch('pygts.visualizer.gpd.read_file')
-    @patch('pygts.visualizer.request_data')
-    def test_displays_map_when_no_save_path(self, mock_request, mock_gdf, mock_show):
+    def test_displays_map_when_no_save_path(self, plot_env):
         """Test that map is displayed when no save path is provided."""
-        # Mock data
-        mock_request.return_value = [{"country": "France", "province": None}]
-        
-        # Mock GeoDataFrames
-        mock_world = MagicMock()
-        mock_provinces = MagicMock()
-        mock_gdf.side_effect = [mock_world, mock_provinces]
+        plot_env.request_data.return_value = [{"country": "France", "province": None}]
         
         plot_species_distribution("Abies", "alba")
         
-        mock_show.assert_called_once()
+        plot_env.show.assert_called_once()
     
-    @patch('pygts.visualizer.plt.savefig')
-    @patch('pygts.visualizer.gpd.read_file')
-    @patch('pygts.visualizer.request_data')
-    def test_saves_map_when_save_path_provided(self, mock_request, mock_gdf, mock_savefig, capsys):
+    def test_saves_map_when_save_path_provided(self, plot_env, mock_savefig, capsys):
         """Test that map is saved when save path is provided."""
-        # Mock data
-        mock_request.return_value = [{"country": "France", "province": None}]
-        
-        # Mock GeoDataFrames
-        mock_world = MagicMock()
-        mock_provinces = MagicMock()
-        mock_gdf.side_effect = [mock_world, mock_provinces]
+        plot_env.request_data.return_value = [{"country": "France", "province": None}]
         
         plot_species_distribution("Abies", "alba", save_path="test_map.png")
         
         mock_savefig.assert_called_once_with("test_map.png", dpi=300, bbox_inches="tight")
+        plot_env.show.assert_not_called()
         captured = capsys.readouterr()
         assert "Map saved to test_map.png" in captured.out
     
-    @patch('pygts.visualizer.plt.show')
-    @patch('pygts.visualizer.gpd.read_file')
-    @patch('pygts.visualizer.request_data')
-    def test_prints_country_distribution(self, mock_request, mock_gdf, mock_show, capsys):
+    def test_prints_country_distribution(self, plot_env, capsys):
         """Test that country distribution is printed."""
-        mock_request.return_value = [
+        plot_env.request_data.return_value = [
             {"country": "France", "province": None},
             {"country": "Spain", "province": None}
         ]
         
-        mock_world = MagicMock()
-        mock_provinces = MagicMock()
-        mock_gdf.side_effect = [mock_world, mock_provinces]
-        
         plot_species_distribution("Abies", "alba")
         
         captured = capsys.readouterr()
-        assert "Abies alba distribution:" in captured.out
-        assert "Countries (entire):" in captured.out
+        expected = ["Abies alba distribution:", "Countries (entire):"]
+        missing = [line for line in expected if line not in captured.out]
+        assert not missing, missing
     
-    @patch('pygts.visualizer.plt.show')
-    @patch('pygts.visualizer.gpd.read_file')
-    @patch('pygts.visualizer.request_data')
-    def test_prints_province_distribution(self, mock_request, mock_gdf, mock_show, capsys):
+    def test_prints_province_distribution(self, plot_env, capsys):
         """Test that province distribution is printed."""
-        mock_request.return_value = [
+        plot_env.request_data.return_value = [
             {"country": "Brazil", "province": "Bahia"},
             {"country": "Brazil", "province": "Ceará"}
         ]
         
-        mock_world = MagicMock()
-        mock_provinces = MagicMock()
-        mock_gdf.side_effect = [mock_world, mock_provinces]
-        
         plot_species_distribution("Abarema", "cochliocarpos")
         
         captured = capsys.readouterr()
-        assert "Specific provinces/states:" in captured.out
-        assert "Brazil: Bahia" in captured.out
-        assert "Brazil: Ceará" in captured.out
-    
-    @patch('pygts.visualizer.plt.show')
-    @patch('pygts.visualizer.gpd.read_file')
-    @patch('pygts.visualizer.request_data')
-    def test_loads_geodata_correctly(self, mock_request, mock_gdf, mock_show):
+        expected = ["Specific provinces/states:", "Brazil: Bahia", "Brazil: Ceará"]
+        missing = [line for line in expected if line not in captured.out]
+        assert not missing, missing
+    
+    def test_loads_geodata_correctly(self, plot_env):
         """Test that GeoDataFrames are loaded with correct URLs."""
-        mock_request.return_value = [{"country": "France", "province": None}]
-        
-        mock_world = MagicMock()
-        mock_provinces = MagicMock()
-        mock_gdf.side_effect = [mock_world, mock_provinces]
+        plot_env.request_data.return_value = [{"country": "France", "province": None}]
         
         plot_species_distribution("Abies", "alba")
         
         # Check that both world map and provinces were loaded
-        assert mock_gdf.call_count == 2
-        calls = mock_gdf.call_args_list
-        assert "ne_110m_admin_0_countries" in calls[0][0][0]
-        assert "ne_10m_admin_1_states_provinces" in calls[1][0][0]
+        assert plot_env.read_file.call_count == 2
+        calls = plot_env.read_file.call_args_list
+        assert "ne_110m_admin_0_countries" in str(calls[0][0][0])
+        assert "ne_10m_admin_1_states_provinces" in str(calls[1][0][0])
+    
+    def test_base_maps_loaded_once_per_process(self, plot_env):
+        """Test that repeated plots reuse the already loaded base maps."""
+        plot_env.request_data.return_value = [{"country": "France", "province": None}]
+        
+        plot_species_distribution("Abies", "alba")
+        plot_species_distribution("Abies", "alba")
+        
+        assert plot_env.read_file.call_count == 2
+    
+    def test_renders_real_geodataframes(self, plot_env, real_base_maps, tmp_path):
+        """Test the full drawing path with small real GeoDataFrames."""
+        plot_env.request_data.return_value = [
+            {"country": "France", "province": None},
+            {"country": "Brazil", "province": "Bahia"}
+        ]
+        plot_env.read_file.side_effect = real_base_maps
+        
+        plot_species_distribution("Abarema", "cochliocarpos")
+        plot_species_distribution("Abarema", "cochliocarpos", save_path=tmp_path / "map.png")
+        
+        plot_env.show.assert_called_once()
+        assert (tmp_path / "map.png").stat().st_size > 0
+    
+    @pytest.mark.parametrize("save_path, simplified", [
+        (None, True),
+        ("map.png", False),
+    ], ids=["display", "save"])
+    def test_provinces_simplified_only_for_display(
+        self, plot_env, mock_savefig, real_base_maps, save_path, simplified
+    ):
+        """Test that highlighted provinces keep full detail when saved."""
+        plot_env.request_data.return_value = [{"country": "Brazil", "province": "Bahia"}]
+        plot_env.read_file.side_effect = real_base_maps
+        
+        with patch.object(
+            gpd.GeoDataFrame, "simplify", autospec=True,
+            side_effect=gpd.GeoDataFrame.simplify,
+        ) as spy:
+            plot_species_distribution("Abarema", "cochliocarpos", save_path=save_path)
+        
+        if simplified:
+            spy.assert_called_once()
+            assert spy.call_args.args[1] == visualizer._DISPLAY_TOLERANCE
+            assert spy.call_args.args[0]["name"].tolist() == ["Bahia"]
+        else:
+            spy.assert_not_called()
 
 
+class TestLoadBaseMaps:
+    """Tests for the cached base map loaders."""
+    
+    def test_loaders_keep_only_plotted_columns(self, map_env, real_base_maps):
+        """Test that unused attribute columns are dropped after loading."""
+        map_env.read_file.side_effect = real_base_maps
+        
+        assert list(visualizer._load_world().columns) == ["NAME", "geometry", "NAME_key"]
+        assert list(visualizer._load_provinces().columns) == [
+            "admin", "name", "geometry", "admin_key", "name_key"
+        ]
+        assert map_env.read_file.call_args_list[0].kwargs["columns"] == ["NAME"]
+        assert map_env.read_file.call_args_list[1].kwargs["columns"] == ["admin", "name"]
+    
+    @patch('pygts.visualizer._HAS_ARROW', True)
+    @patch('pygts.visualizer.gpd.read_parquet')
+    def test_parquet_copy_written_then_reused(self, mock_parquet, map_env, tmp_path):
+        """Test that a GeoParquet copy replaces shapefile parsing once written."""
+        archive = tmp_path / "countries.zip"
+        archive.touch()
+        read_file = map_env.read_file
+        read_file.side_effect = None
+        read_file.return_value.to_parquet.side_effect = lambda path: path.touch()
+        visualizer._read_base_map("https://example.org/countries.zip", ["NAME"])
+        read_file.return_value.to_parquet.assert_called_once_with(
+            tmp_path / "countries.parquet.part"
+        )
+        assert (tmp_path / "countries.parquet").exists()
+        assert not (tmp_path / "countries.parquet.part").exists()
+        visualizer._read_base_map("https://example.org/countries.zip", ["NAME"])
+        
+        assert read_file.call_count == 1
+        mock_parquet.assert_called_once_with(
+            tmp_path / "countries.parquet", columns=["NAME", "geometry"]
+        )
+    
+    @patch('pygts.visualizer._HAS_ARROW', True)
+    @patch('pygts.visualizer.gpd.read_parquet', side_effect=ValueError("truncated"))
+    def test_unreadable_parquet_copy_rebuilt(self, mock_parquet, map_env, tmp_path):
+        """Test that a corrupt GeoParquet copy falls back to the archive."""
+        archive = tmp_path / "countries.zip"
+        archive.touch()
+        read_file = map_env.read_file
+        read_file.side_effect = None
+        (tmp_path / "countries.parquet").write_bytes(b"PAR1")
+        read_file.return_value.to_parquet.side_effect = lambda path: path.touch()
+        result = visualizer._read_base_map("https://example.org/countries.zip", ["NAME"])
+        
+        assert result is read_file.return_value
+        read_file.return_value.to_parquet.assert_called_once_with(
+            tmp_path / "countries.parquet.part"
+        )
+
+
+class TestMatchLocations:
+    """Tests for _match_locations function."""
+    
+    def test_marks_listed_countries_and_provinces(self):
+        """Test that only listed countries and (country, province) pairs match."""
+        world = _with_match_keys(gpd.GeoDataFrame(
+            {"NAME": ["France", "Brazil"]},
+            geometry=[box(0, 40, 5, 50), box(-60, -20, -40, 0)],
+        ), ["NAME"])
+        provinces = _with_match_keys(gpd.GeoDataFrame(
+            {"admin": ["Brazil", "Brazil", "Argentina"], "name": ["Bahia", "Ceará", "Bahia"]},
+            geometry=[box(-45, -15, -40, -10), box(-42, -8, -38, -3), box(-65, -40, -60, -35)],
+        ), ["admin", "name"])
+        
+        world_mask, province_mask = _match_locations(
+            world, provinces, ["France"], [("Brazil", "Bahia")]
+        )
+        
+        assert world_mask.tolist() == [True, False]
+        assert province_mask.tolist() == [True, False, False]
+        assert "species_present" not in world.columns
+        assert "species_present" not in provinces.columns
+    
+    def test_no_pairs_matches_no_province(self):
+        """Test that country-only data highlights no province."""
+        world = _with_match_keys(gpd.GeoDataFrame(
+            {"NAME": ["France"]}, geometry=[box(0, 40, 5, 50)]
+        ), ["NAME"])
+        provinces = _with_match_keys(gpd.GeoDataFrame(
+            {"admin": ["Brazil"], "name": ["Bahia"]}, geometry=[box(-45, -15, -40, -10)]
+        ), ["admin", "name"])
+        
+        world_mask, province_mask = _match_locations(world, provinces, ["France"], [])
+        
+        assert world_mask.tolist() == [True]
+        assert province_mask.tolist() == [False]
+    
+    def test_ignores_accents_and_case(self):
+        """Test that accent and case differences still match."""
+        world = _with_match_keys(gpd.GeoDataFrame(
+            {"NAME": ["Côte d'Ivoire"]}, geometry=[box(-8, 4, -3, 10)]
+        ), ["NAME"])
+        provinces = _with_match_keys(gpd.GeoDataFrame(
+            {"admin": ["Brazil"], "name": ["Ceará"]}, geometry=[box(-42, -8, -38, -3)]
+        ), ["admin", "name"])
+        
+        world_mask, province_mask = _match_locations(
+            world, provinces, ["Cote d'Ivoire"], [("brazil", "Ceara")]
+        )
+        
+        assert world_mask.tolist() == [True]
+        assert province_mask.tolist() == [True]
+    
+    @pytest.mark.parametrize("name, expected", [
+        ("Côte d'Ivoire", "cote d'ivoire"),
+        ("Łódzkie", "łodzkie"),
+        ("Østfold", "østfold"),
+        ("Thüringen", "thuringen"),
+        ("北京", "北京"),
+    ])
+    def test_normalize_name_keeps_letters(self, name, expected):
+        """Test that only accents are folded, never whole letters dropped."""
+        assert _normalize_name(name) == expected
+
+
+class TestCachedDownload:
+    """Tests for _cached_download function."""
+    
+    @patch('pygts.visualizer._SESSION.get')
+    def test_downloads_once_into_cache_dir(self, mock_get, tmp_path, monkeypatch):
+        """Test that archives are downloaded once and then served from disk."""
+        monkeypatch.setenv("PYGTS_CACHE_DIR", str(tmp_path))
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_content.return_value = [b"zip", b"data"]
+        mock_get.return_value = mock_response
+        
+        first = _cached_download("https://example.org/maps/countries.zip")
+        second = _cached_download("https://example.org/maps/countries.zip")
+        
+        assert first == second == tmp_path / "countries.zip"
+        assert first.read_bytes() == b"zipdata"
+        assert mock_get.call_count == 1
+        assert list(tmp_path.iterdir()) == [first]
+    
+    @patch('pygts.visualizer._SESSION.get')
+    def test_failed_download_leaves_no_file(self, mock_get, tmp_path, monkeypatch):
+        """Test that HTTP errors do not leave a cached archive behind."""
+        monkeypatch.setenv("PYGTS_CACHE_DIR", str(tmp_path))
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.raise_for_status.side_effect = Exception("404")
+        mock_get.return_value = mock_response
+        
+        with pytest.raises(Exception):
+            _cached_download("https://example.org/maps/countries.zip")
+        
+        assert not (tmp_path / "countries.zip").exists()
+
+
+@pytest.mark.integration
 class TestIntegrationVisualizer:
     """Integration tests for visualizer (real API, mocked plotting)."""
     
-    @patch('pygts.visualizer.plt.show')
-    @patch('pygts.visualizer.gpd.read_file')
-    def test_real_species_visualization(self, mock_gdf, mock_show):
+    def test_real_species_visualization(self, map_env):
         """Test visualization with real species data."""
-        mock_world = MagicMock()
-        mock_provinces = MagicMock()
-        mock_gdf.side_effect = [mock_world, mock_provinces]
-        
         # This should succeed without errors
         plot_species_distribution("Abarema", "cochliocarpos")
         
         # Verify that geodata was loaded
-        assert mock_gdf.call_count == 2
+        assert map_env.read_file.call_count == 2